@@ -1,9 +1,163 @@
+import hashlib
+import json
 import math
 import os
+import PIL
 from PIL import Image, ImageDraw, ImageFont
 
 
-def draw_text_on_arc(image, center_xy, radius, start_angle_deg, text, font, fill):
+# Characters whose advances, kerning pairs and bounding boxes are tabulated per font.
+METRICS_ALPHABET = ''.join(chr(c) for c in range(32, 127))
+METRICS_FILE_SUFFIX = '.metrics.json'
+
+# Metrics tables keyed by (font path, font size), filled from disk or built on first use.
+_FONT_METRICS = {}
+
+
+def _font_file_hash(font_path):
+    with open(font_path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _build_font_metrics(font, alphabet=METRICS_ALPHABET):
+    """Measures advances, pair kerning and glyph bounding boxes for every character in alphabet."""
+    advances = {char: font.getlength(char) for char in alphabet}
+    kerning = {}
+    for first in alphabet:
+        for second in alphabet:
+            kern = font.getlength(first + second) - advances[first] - advances[second]
+            if kern:
+                kerning[first + second] = kern
+    bboxes = {char: list(font.getbbox(char)) for char in alphabet}
+    return {"advances": advances, "kerning": kerning, "bboxes": bboxes}
+
+
+def get_font_metrics(font):
+    """
+    Returns the metrics table for a font, building and persisting it on first use.
+
+    Tables are saved next to the font file (dum1.ttf -> dum1.metrics.json), one entry
+    per font size, and rebuilt if the font file or Pillow version changes. Returns
+    None when the text layout is not a plain sum of advances and pair kerning
+    (the Raqm engine can form ligatures), in which case text is measured directly.
+    """
+    if font.layout_engine != ImageFont.Layout.BASIC or not isinstance(font.path, str):
+        return None
+    key = (font.path, font.size)
+    if key in _FONT_METRICS:
+        return _FONT_METRICS[key]
+
+    metrics_path = os.path.splitext(font.path)[0] + METRICS_FILE_SUFFIX
+    font_hash = _font_file_hash(font.path)
+    stored = None
+    if os.path.exists(metrics_path):
+        try:
+            with open(metrics_path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable metrics file {metrics_path}: {e}")
+    if not stored or stored.get("font_sha1") != font_hash or stored.get("pillow") != PIL.__version__:
+        stored = {"font_sha1": font_hash, "pillow": PIL.__version__, "alphabet": METRICS_ALPHABET, "sizes": {}}
+
+    size_key = str(font.size)
+    if size_key not in stored["sizes"]:
+        stored["sizes"][size_key] = _build_font_metrics(font, stored["alphabet"])
+        # Write then rename so concurrent renderers never read a partial file.
+        tmp_path = f"{metrics_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(stored, f)
+        os.replace(tmp_path, metrics_path)
+        print(f"Saved {font.size}px metrics for {font.path} to {metrics_path}")
+
+    _FONT_METRICS[key] = stored["sizes"][size_key]
+    return _FONT_METRICS[key]
+
+
+def _prefix_widths(font, text):
+    """
+    Returns the kerning-aware width of every prefix of text, from text[:0] to text[:len(text)].
+
+    Uses the font's metrics table when every character is tabulated, otherwise measures
+    each prefix with the font.
+    """
+    metrics = get_font_metrics(font)
+    if metrics is None or not all(char in metrics["advances"] for char in text):
+        return [font.getlength(text[:i]) for i in range(len(text) + 1)]
+
+    advances = metrics["advances"]
+    kerning = metrics["kerning"]
+    widths = [0.0]
+    for i, char in enumerate(text):
+        width = widths[-1] + advances[char]
+        if i > 0:
+            width += kerning.get(text[i - 1] + char, 0)
+        widths.append(width)
+    return widths
+
+
+def text_length(font, text):
+    """Returns the kerning-aware advance width of text, the same value as ImageDraw.textlength."""
+    return _prefix_widths(font, text)[-1]
+
+
+def _glyph_bbox(font, char):
+    metrics = get_font_metrics(font)
+    if metrics is not None and char in metrics["bboxes"]:
+        return metrics["bboxes"][char]
+    return font.getbbox(char)
+
+
+def arc_char_angles(text, font, radius, start_angle_deg):
+    """
+    Returns the angle in radians of the center of each character of text on the arc.
+
+    Text is laid out clockwise from start_angle_deg, see draw_text_on_arc.
+    """
+    return _angles_from_widths(_prefix_widths(font, text), radius, start_angle_deg)
+
+
+def _angles_from_widths(widths, radius, start_angle_deg):
+    start_angle_rad = math.radians(start_angle_deg)
+    angles = []
+    for i in range(len(widths) - 1):
+        width_before = widths[i]
+        # This is the advance width of the character itself.
+        char_advance = widths[i + 1] - width_before
+        # The angle for the center of this character.
+        # We add half the character's advance to the width before it.
+        angles.append(start_angle_rad - (width_before + char_advance / 2) / radius)
+    return angles
+
+
+def verify_font_metrics(font, texts, radius=400, start_angle_deg=90):
+    """
+    Checks the cached metrics layout of texts against measuring every prefix with the font.
+
+    For each text, the character angles from arc_char_angles must equal the ones
+    computed from font.getlength of each prefix (what ImageDraw.textlength returns),
+    and every glyph bbox must equal font.getbbox.
+
+    Returns:
+        list: A description of each mismatch; empty if the metrics table is exact.
+    """
+    mismatches = []
+    for text in texts:
+        reference_widths = [font.getlength(text[:i]) for i in range(len(text) + 1)]
+        expected = _angles_from_widths(reference_widths, radius, start_angle_deg)
+        actual = arc_char_angles(text, font, radius, start_angle_deg)
+        for i, (char, want, got) in enumerate(zip(text, expected, actual)):
+            if want != got:
+                mismatches.append(f"{text!r}: angle of {char!r} at {i} is {got}, expected {want}")
+                break
+        for char in sorted(set(text)):
+            if list(_glyph_bbox(font, char)) != list(font.getbbox(char)):
+                mismatches.append(f"{text!r}: bbox of {char!r} is {list(_glyph_bbox(font, char))}, "
+                                  f"expected {list(font.getbbox(char))}")
+    return mismatches
+
+
+def draw_text_on_arc(image, center_xy, radius, start_angle_deg, text, font, fill,
+                     resample=Image.Resampling.BICUBIC):
     """
     Draws text along a circular arc, with each letter individually rotated.
 
@@ -16,38 +170,33 @@ def draw_text_on_arc(image, center_xy, radius, start_angle_deg, text, font, fill
         text (str): The text to display (will be converted to uppercase).
         font (PIL.ImageFont.FreeTypeFont): The font to use for the text.
         fill (tuple or str): The color of the text.
+        resample (PIL.Image.Resampling): Filter used to rotate each glyph.
+
+    Returns:
+        tuple or None: (text_layer, (x, y)) where text_layer is an RGBA image holding
+                       only the drawn text and (x, y) is its top-left offset on `image`.
+                       None if nothing was drawn.
     """
     if not text:
-        return
+        return None
     text = text.strip()
 
-    transparent_image = Image.new('RGBA', image.size, (0, 0, 0, 0))
-    draw = ImageDraw.Draw(transparent_image)
     center_x, center_y = center_xy
 
     # The start_angle_deg is the angle where the text should begin.
     # The caller is responsible for calculating this to center the text block if desired.
-    start_angle_rad = math.radians(start_angle_deg)
-
-    for i, char in enumerate(text):
-        # --- 1. Calculate character's center position on the arc ---
-        # Use textlength to get kerning-aware positioning.
-        # This measures the width of the string up to the current character.
-        width_before = draw.textlength(text[:i], font=font)
-        # This is the advance width of the character itself.
-        char_advance = draw.textlength(text[:i+1], font=font) - width_before
-
-        # The angle for the center of this character.
-        # We add half the character's advance to the width before it.
-        angle_offset_rad = (width_before + char_advance / 2) / radius
-        char_angle_rad = start_angle_rad - angle_offset_rad
+    # --- 1. Calculate each character's center position on the arc from cached metrics ---
+    char_angles = arc_char_angles(text, font, radius, start_angle_deg)
 
+    # Rotated glyphs and their top-left positions on the main image.
+    glyphs = []
+    for char, char_angle_rad in zip(text, char_angles):
         char_x = center_x + radius * math.cos(char_angle_rad)
         char_y = center_y + radius * math.sin(char_angle_rad)
 
         # --- 2. Create a temporary image for the single rotated character ---
         # Get character glyph size from its bounding box.
-        left, top, right, bottom = font.getbbox(char)
+        left, top, right, bottom = _glyph_bbox(font, char)
         char_width = right - left
         char_height = max(40, bottom - top)
 
@@ -68,16 +217,30 @@ def draw_text_on_arc(image, center_xy, radius, start_angle_deg, text, font, fill
 
         # --- 3. Rotate the character to be tangent to the arc ---
         rotation_angle = -math.degrees(char_angle_rad) + 90
-        rotated_char_img = temp_img.rotate(rotation_angle, expand=True, resample=Image.Resampling.BICUBIC)
+        rotated_char_img = temp_img.rotate(rotation_angle, expand=True, resample=resample)
 
-        # --- 4. Paste the rotated character onto the main image ---
         # Calculate top-left corner for pasting to center the character on its arc position
         paste_x = int(char_x - rotated_char_img.width / 2)
         paste_y = int(char_y - rotated_char_img.height / 2)
-        transparent_image.paste(rotated_char_img, (paste_x, paste_y), rotated_char_img)
-    # Composite the transparent image with the drawn text onto the original image
-    image.alpha_composite(transparent_image)
-    return transparent_image
+        glyphs.append((rotated_char_img, paste_x, paste_y))
+
+    # --- 4. Paste the rotated characters onto a layer covering only their area ---
+    # The layer is clipped to the image so it composites exactly like a full-size one.
+    if not glyphs:
+        return None
+    x0 = max(0, min(x for _, x, _ in glyphs))
+    y0 = max(0, min(y for _, _, y in glyphs))
+    x1 = min(image.width, max(x + g.width for g, x, _ in glyphs))
+    y1 = min(image.height, max(y + g.height for g, _, y in glyphs))
+    if x1 <= x0 or y1 <= y0:
+        return None
+
+    text_layer = Image.new('RGBA', (x1 - x0, y1 - y0), (0, 0, 0, 0))
+    for rotated_char_img, paste_x, paste_y in glyphs:
+        text_layer.paste(rotated_char_img, (paste_x - x0, paste_y - y0), rotated_char_img)
+    # Composite only the dirty rectangle onto the original image
+    image.alpha_composite(text_layer, dest=(x0, y0))
+    return text_layer, (x0, y0)
 
 def save_arc_text_example(filename="arc_text_example.png", text="EXAMPLE TEXT ON ARC"):
     """
@@ -116,7 +279,7 @@ def save_arc_text_example(filename="arc_text_example.png", text="EXAMPLE TEXT ON
     )
 
     # --- Draw Text on Top Arc ---
-    text_width = draw.textlength(text, font=font)
+    text_width = text_length(font, text)
     text_angle_deg = math.degrees( text_width / radius)
     # For drawing on the top arc, start angle should be calculated to center the text.
     # 90 degrees is the top of the circle. We start from the left of the top.
@@ -0,0 +1,99 @@
+import json
+import os
+
+import create_tokens
+from catalog import iter_characters, normalize_id, read_script_ids, select_characters
+from create_print_sheets import layout_sheets
+from parallel_render import render_characters
+from quality import profile_output_dir
+
+
+MANIFEST_FILENAME = 'box_manifest.json'
+
+
+def _script_name(script_path):
+    """Returns the script's name from its _meta entry, falling back to the file name."""
+    with open(script_path, 'r', encoding='utf-8') as f:
+        script = json.load(f)
+    for entry in script:
+        if isinstance(entry, dict) and entry.get("id") == "_meta" and entry.get("name"):
+            return entry["name"]
+    return os.path.splitext(os.path.basename(script_path))[0]
+
+
+def build_box(script_paths, catalog_paths=(create_tokens.JSON_FILE_PATH,), output_dir='print_sheets/box', workers=1):
+    """
+    Renders the characters of several scripts and packs them on one run of print sheets.
+
+    Each character id is rendered once no matter how many scripts use it, so the
+    work scales with the number of unique characters. The font and background caches
+    in create_tokens are shared by every token in the run.
+
+    Args:
+        script_paths (list): Paths of the script JSON files that go in the box.
+        catalog_paths (list): Character catalog JSON files the scripts' ids are looked up in.
+        output_dir (str): The folder to save the sheets and the manifest in.
+        workers (int): Number of worker processes to render with.
+
+    Returns:
+        dict: The manifest that was written to output_dir.
+    """
+    scripts = []
+    wanted_ids = set()
+    for script_path in script_paths:
+        script_ids = read_script_ids(script_path)
+        scripts.append((script_path, _script_name(script_path), script_ids))
+        wanted_ids.update(script_ids)
+
+    characters = select_characters(iter_characters(*catalog_paths), script_ids=wanted_ids)
+    characters.sort(key=lambda c: (c["team"], c["id"]))
+    print(f"Box: {len(scripts)} scripts, {len(wanted_ids)} unique ids, {len(characters)} found in catalog.")
+
+    # --- 1. Render every unique character once ---
+    unique_characters = {}
+    for character in characters:
+        # Ids that only differ in case or separators are the same character
+        unique_characters.setdefault(normalize_id(character["id"]), character)
+
+    os.makedirs(profile_output_dir(create_tokens.OUTPUT_FOLDER), exist_ok=True)
+    results = render_characters(list(unique_characters.values()), workers=workers)
+    rendered = {}
+    for (norm_id, character), (token_path, reminder_paths) in zip(unique_characters.items(), results):
+        rendered[norm_id] = {
+            "id": character["id"],
+            "team": character["team"],
+            "token": token_path,
+            "reminders": reminder_paths,
+        }
+
+    # --- 2. Pack all tokens on one combined sheet run ---
+    char_paths = [entry["token"] for entry in rendered.values() if entry["token"]]
+    reminder_paths = [path for entry in rendered.values() for path in entry["reminders"]]
+    placements = layout_sheets(char_paths, reminder_paths, output_dir)
+
+    # --- 3. Write the per-script manifest ---
+    manifest = {"scripts": []}
+    for script_path, name, script_ids in scripts:
+        script_characters = []
+        for norm_id in sorted(rendered.keys() & script_ids):
+            entry = rendered[norm_id]
+            script_characters.append({
+                "id": entry["id"],
+                "team": entry["team"],
+                "token": entry["token"],
+                "sheet": placements.get(entry["token"]),
+                "reminders": [{"path": path, "sheet": placements.get(path)} for path in entry["reminders"]],
+            })
+        manifest["scripts"].append({
+            "name": name,
+            "path": script_path,
+            "characters": script_characters,
+            # Listed as spelled in the script so they can be found and fixed there
+            "missing": sorted(script_ids[norm_id] for norm_id in script_ids.keys() - rendered.keys()),
+        })
+
+    manifest_path = os.path.join(output_dir, MANIFEST_FILENAME)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=4)
+    print(f"Saved box manifest to {manifest_path}")
+    return manifest
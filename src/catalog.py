@@ -0,0 +1,223 @@
+import json
+import os
+import re
+
+
+CHUNK_SIZE = 64 * 1024
+IMAGE_ASSETS_PATH = "assets/character_images"
+
+_decoder = json.JSONDecoder()
+
+
+def _iter_json_array(f, chunk_size=CHUNK_SIZE):
+    """
+    Yields the elements of a top-level JSON array one at a time.
+
+    Only the element being decoded and the unread part of the current chunk are
+    held in memory, so catalogs of any size can be walked. The array is checked
+    as strictly as json.load would: elements are separated by exactly one comma
+    and nothing but whitespace may follow the closing bracket. Error positions
+    are character offsets into the file.
+    """
+    buffer = ""
+    pos = 0
+    consumed = 0  # Characters dropped from the front of the buffer so far
+    eof = False
+    # What may come next: "[", a "value" or "]" right after "[", a "value" after a
+    # comma, a "separator" ("," or "]") after a value, and "end" after the "]".
+    expect = "["
+
+    def fill():
+        nonlocal buffer, pos, consumed, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+        consumed += pos
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    def error(message, at):
+        return ValueError(f"{message}: char {consumed + at}")
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n":
+            pos += 1
+        if pos >= len(buffer):
+            if eof:
+                if expect == "end":
+                    return
+                raise error("Unexpected end of catalog, expected ']'", pos)
+            fill()
+            continue
+
+        char = buffer[pos]
+        if expect == "[":
+            if char != "[":
+                raise error("Catalog must be a JSON array of characters", pos)
+            expect = "first"
+            pos += 1
+            continue
+        if expect == "end":
+            raise error("Extra data after the catalog array", pos)
+        if expect == "separator":
+            if char == ",":
+                expect = "value"
+            elif char == "]":
+                expect = "end"
+            else:
+                raise error("Expecting ',' delimiter", pos)
+            pos += 1
+            continue
+        if char == "]" and expect == "first":
+            expect = "end"
+            pos += 1
+            continue
+
+        try:
+            element, end = _decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError as e:
+            if eof:
+                raise error(e.msg, e.pos) from None
+            fill()  # The element continues past the end of the buffer
+            continue
+        # A number at the very end of the buffer may still be incomplete.
+        if end == len(buffer) and not eof:
+            fill()
+            continue
+        pos = end
+        expect = "separator"
+        yield element
+
+
+def _background_variant(raw):
+    """Selects the token background from the character's night order entries."""
+    has_first_night = "firstNight" in raw
+    has_other_night = "otherNight" in raw
+    if has_first_night and has_other_night:
+        return "both"
+    if has_first_night:
+        return "first"
+    if has_other_night:
+        return "other"
+    return "none"
+
+
+def normalize_character(raw):
+    """
+    Validates a raw catalog entry and returns a normalized character record.
+
+    The record keeps every original key and guarantees these ones, so renderers
+    can index them directly:
+        id, name, team, ability (str), image (first URL or None), reminders (list),
+        background ("both", "first", "other" or "none"), reminder_count (int),
+        image_cache_path (local cache file for the art).
+
+    Raises:
+        ValueError: If the entry is not a character (e.g. _meta) or is malformed.
+    """
+    if not isinstance(raw, dict):
+        raise ValueError(f"expected an object, got {type(raw).__name__}")
+    char_id = raw.get("id")
+    if not char_id or not isinstance(char_id, str):
+        raise ValueError("missing 'id'")
+    if char_id == "_meta":
+        raise ValueError("'_meta' is not a character")
+
+    image = raw.get("image")
+    if isinstance(image, list):
+        image = image[0] if image else None
+    if image is not None and not isinstance(image, str):
+        raise ValueError(f"'{char_id}' has an invalid 'image'")
+
+    reminders = raw.get("reminders") or []
+    if not isinstance(reminders, list) or not all(isinstance(r, str) for r in reminders):
+        raise ValueError(f"'{char_id}' has invalid 'reminders'")
+
+    texts = {key: raw.get(key) or "" for key in ("name", "team", "ability")}
+    for key, value in texts.items():
+        if not isinstance(value, str):
+            raise ValueError(f"'{char_id}' has an invalid '{key}'")
+
+    record = dict(raw)
+    record.update({
+        "id": char_id,
+        **texts,
+        "image": image,
+        "reminders": reminders,
+        "background": _background_variant(raw),
+        "reminder_count": len(reminders),
+        "image_cache_path": os.path.join(IMAGE_ASSETS_PATH, f"{char_id}.png"),
+    })
+    return record
+
+
+def iter_characters(*json_paths):
+    """
+    Streams validated character records from one or more catalog JSON files.
+
+    Entries are yielded in file order. Later entries with an id that was already
+    seen are dropped, so the first catalog listed wins. Invalid entries are
+    reported and skipped.
+    """
+    seen_ids = set()
+    for json_path in json_paths:
+        with open(json_path, 'r', encoding='utf-8') as f:
+            for index, raw in enumerate(_iter_json_array(f)):
+                if isinstance(raw, dict) and raw.get("id") == "_meta":
+                    continue
+                try:
+                    record = normalize_character(raw)
+                except ValueError as e:
+                    print(f"Skipping entry {index} in {json_path}: {e}")
+                    continue
+                if record["id"] in seen_ids:
+                    print(f"Skipping duplicate '{record['id']}' in {json_path}")
+                    continue
+                seen_ids.add(record["id"])
+                yield record
+
+
+def normalize_id(char_id):
+    """Lowercases an id and drops separators so 'fortune_teller' matches 'fortuneteller'."""
+    return re.sub(r'[^a-z0-9]', '', str(char_id).lower())
+
+
+def read_script_ids(script_path):
+    """
+    Reads the character ids listed in a script JSON file.
+
+    Entries may be plain id strings or character objects with an "id" key.
+    The "_meta" entry is ignored.
+
+    Returns:
+        dict: Maps each normalized id to the id as first spelled in the script.
+    """
+    with open(script_path, 'r', encoding='utf-8') as f:
+        script = json.load(f)
+
+    ids = {}
+    for entry in script:
+        char_id = entry.get("id") if isinstance(entry, dict) else entry
+        if char_id and char_id != "_meta":
+            ids.setdefault(normalize_id(char_id), char_id)
+    return ids
+
+
+def select_characters(characters, only=None, teams=None, script_ids=None):
+    """
+    Filters catalog records by id, team and script membership. Filters are ANDed together.
+
+    only, teams and script_ids are collections of normalized ids (see normalize_id),
+    or None to not filter on that field.
+    """
+    selected = []
+    for character in characters:
+        norm_id = normalize_id(character["id"])
+        if only is not None and norm_id not in only:
+            continue
+        if teams is not None and normalize_id(character["team"]) not in teams:
+            continue
+        if script_ids is not None and norm_id not in script_ids:
+            continue
+        selected.append(character)
+    return selected
@@ -0,0 +1,173 @@
+import argparse
+import os
+import sys
+import time
+
+from catalog import normalize_id, read_script_ids, select_characters
+
+
+DEFAULT_CATALOG = 'assets/json/menagerie_fixed.json'
+DEFAULT_BOX_DIR = 'print_sheets/box'
+
+
+def _split_list(value):
+    """Splits a comma separated argument into a set of normalized values."""
+    if not value:
+        return None
+    return {normalize_id(v) for v in value.split(',') if v.strip()}
+
+
+def _positive_int(value):
+    """argparse type for worker counts."""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive whole number, got '{value}'")
+    return number
+
+
+def _tolerance(value):
+    """argparse type for compare --tolerance."""
+    import compare_renders
+    try:
+        return compare_renders.parse_tolerance(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+def _render(args, with_tokens, with_reminders):
+    # Imported here so `sheets` and `--help` never load the renderer.
+    import create_tokens
+    from catalog import iter_characters
+    from parallel_render import render_characters
+    from quality import profile_output_dir
+
+    characters = iter_characters(*(args.catalog or [DEFAULT_CATALOG]))
+    script_ids = read_script_ids(args.script) if args.script else None
+    selected = select_characters(characters, _split_list(args.only), _split_list(args.team), script_ids)
+    if not selected:
+        print("No characters matched the given filters.")
+        return
+
+    os.makedirs(profile_output_dir(create_tokens.OUTPUT_FOLDER), exist_ok=True)
+    render_characters(selected, with_tokens, with_reminders, args.workers)
+
+
+def _sheets(args):
+    import create_print_sheets
+    create_print_sheets.main()
+
+
+def _cmd_tokens(args):
+    _render(args, with_tokens=True, with_reminders=False)
+
+
+def _cmd_reminders(args):
+    _render(args, with_tokens=False, with_reminders=True)
+
+
+def _cmd_all(args):
+    _render(args, with_tokens=True, with_reminders=True)
+    _sheets(args)
+
+
+def _cmd_box(args):
+    import build_box
+    from quality import profile_output_dir
+    output_dir = args.output_dir or profile_output_dir(DEFAULT_BOX_DIR)
+    build_box.build_box(args.scripts, args.catalog or [DEFAULT_CATALOG], output_dir, args.workers)
+
+
+def _cmd_verify_metrics(args):
+    import create_tokens
+    from catalog import iter_characters
+    characters = iter_characters(*(args.catalog or [DEFAULT_CATALOG]))
+    script_ids = read_script_ids(args.script) if args.script else None
+    selected = select_characters(characters, _split_list(args.only), _split_list(args.team), script_ids)
+    mismatches = create_tokens.verify_arc_text_metrics(selected)
+    for mismatch in mismatches:
+        print(f"MISMATCH {mismatch}")
+    print(f"Checked the arc text of {len(selected)} characters, {len(mismatches)} mismatches.")
+    return 1 if mismatches else 0
+
+
+def _cmd_compare(args):
+    import compare_renders
+    for directory in (args.golden, args.output):
+        if not os.path.isdir(directory):
+            print(f"Directory not found: {directory}")
+            return 1
+    results = compare_renders.compare_trees(args.golden, args.output, args.tolerance,
+                                            args.max_bad_fraction, args.heatmaps, args.workers)
+    if not results:
+        print("No images found to compare.")
+        return 1
+    return 1 if compare_renders.print_report(results) else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Render Blood on the Clocktower tokens and print sheets.")
+    parser.add_argument("--quality", choices=["draft", "final"], default="final",
+                        help="Render profile: draft is fast and low resolution without reminder tokens and is written "
+                             "to separate *_draft folders (default: final).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    filters = argparse.ArgumentParser(add_help=False)
+    filters.add_argument("--catalog", action="append",
+                         help=f"Character catalog JSON, repeat to merge several; earlier ones win on duplicate ids "
+                              f"(default: {DEFAULT_CATALOG}).")
+    filters.add_argument("--only", help="Comma separated character ids to render, e.g. banker,oaf.")
+    filters.add_argument("--team", help="Comma separated teams to render, e.g. townsfolk,demon.")
+    filters.add_argument("--script", help="Script JSON; only characters listed in it are rendered.")
+    filters.add_argument("--workers", type=_positive_int, default=1,
+                         help="Worker processes to render with; art and backgrounds are shared between them (default: 1).")
+
+    subparsers.add_parser("tokens", parents=[filters], help="Render character tokens.").set_defaults(func=_cmd_tokens)
+    subparsers.add_parser("reminders", parents=[filters], help="Render reminder tokens.").set_defaults(func=_cmd_reminders)
+    subparsers.add_parser("sheets", help="Lay out rendered tokens on print sheets.").set_defaults(func=_sheets)
+    subparsers.add_parser("all", parents=[filters], help="Render tokens and reminders, then print sheets.").set_defaults(func=_cmd_all)
+
+    box = subparsers.add_parser("box", help="Render several scripts once and pack them on shared print sheets.")
+    box.add_argument("scripts", nargs="+", help="Script JSON files that go in the box.")
+    box.add_argument("--catalog", action="append",
+                     help=f"Character catalog JSON, repeat to merge several (default: {DEFAULT_CATALOG}).")
+    box.add_argument("--output-dir",
+                     help=f"Folder for the combined sheets and manifest (default: {DEFAULT_BOX_DIR}, "
+                          f"or {DEFAULT_BOX_DIR}_draft with --quality draft).")
+    box.add_argument("--workers", type=_positive_int, default=1,
+                     help="Worker processes to render with (default: 1).")
+    box.set_defaults(func=_cmd_box)
+
+    subparsers.add_parser("verify-metrics", parents=[filters],
+                          help="Check cached font metrics against direct measurement of every name and reminder."
+                          ).set_defaults(func=_cmd_verify_metrics)
+
+    compare = subparsers.add_parser("compare", help="Check a tree of rendered tokens against a golden tree.")
+    compare.add_argument("golden", help="Folder of reference renders.")
+    compare.add_argument("output", help="Folder of renders to check.")
+    compare.add_argument("--tolerance", type=_tolerance, default="0",
+                         help="Allowed difference per channel, one value or R,G,B,A (default: 0).")
+    compare.add_argument("--max-bad-fraction", type=float, default=0.0,
+                         help="Fraction of pixels per image allowed over tolerance (default: 0).")
+    compare.add_argument("--heatmaps", help="Folder to save difference heatmaps of failing images in.")
+    compare.add_argument("--workers", type=_positive_int, default=None,
+                         help="Worker processes to compare with (default: one per CPU).")
+    compare.set_defaults(func=_cmd_compare)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    import quality
+    quality.set_profile(args.quality)
+
+    start = time.perf_counter()
+    status = args.func(args)
+    print(f"Finished '{args.command}' in {time.perf_counter() - start:.1f}s ({args.quality} profile).")
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,165 @@
+import multiprocessing
+import os
+
+import numpy as np
+from PIL import Image
+
+
+# Tolerance for each of the R, G, B and A channels, in 0-255 steps.
+DEFAULT_TOLERANCE = (0, 0, 0, 0)
+
+
+def collect_pngs(directory):
+    """Returns the paths of every .png below directory, relative to it and sorted."""
+    paths = []
+    for root, _, files in os.walk(directory):
+        for file in files:
+            if file.lower().endswith('.png'):
+                paths.append(os.path.relpath(os.path.join(root, file), directory))
+    return sorted(paths)
+
+
+def _load_rgba(path):
+    with Image.open(path) as img:
+        return np.asarray(img.convert("RGBA"))
+
+
+def _same_file_contents(path_a, path_b):
+    """True if both files hold the same bytes; identical PNGs need no decoding."""
+    if os.path.getsize(path_a) != os.path.getsize(path_b):
+        return False
+    with open(path_a, 'rb') as file_a, open(path_b, 'rb') as file_b:
+        return file_a.read() == file_b.read()
+
+
+def compare_images(golden, output, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compares two RGBA uint8 arrays of the same shape with alpha-aware metrics.
+
+    Colors are premultiplied by alpha before diffing, so the RGB of fully transparent
+    pixels is ignored and differences fade with coverage. Only pixels whose raw
+    values differ are converted and diffed.
+
+    Returns:
+        tuple: (metrics, heat) where heat is an H x W array of the largest channel
+               difference of each pixel and metrics is a dict with max_diff per channel,
+               mean_diff, bad_pixels (pixels over tolerance in any channel) and bad_fraction.
+    """
+    changed = (golden != output).any(axis=-1)
+
+    def premultiply(rgba):
+        rgba = rgba.astype(np.int32)
+        alpha = rgba[:, 3:4]
+        return np.concatenate(((rgba[:, :3] * alpha + 127) // 255, alpha), axis=-1)
+
+    # N x 4 differences of the changed pixels only.
+    diff = np.abs(premultiply(golden[changed]) - premultiply(output[changed]))
+    bad_pixels = int((diff > np.asarray(tolerance)).any(axis=-1).sum())
+    pixel_count = changed.size
+    heat = np.zeros(changed.shape, dtype=np.uint8)
+    heat[changed] = diff.max(axis=-1, initial=0)
+    metrics = {
+        "max_diff": [int(v) for v in diff.max(axis=0, initial=0)],
+        "mean_diff": float(diff.sum()) / (pixel_count * 4),
+        "bad_pixels": bad_pixels,
+        "bad_fraction": bad_pixels / pixel_count,
+    }
+    return metrics, heat
+
+
+def save_heatmap(golden, heat, heatmap_path):
+    """Saves the per-pixel difference in red over a dimmed copy of the golden image."""
+    heat = heat.astype(np.uint32) * 255 // max(int(heat.max()), 1)
+    rgb = golden[..., :3].astype(np.uint32)
+    luminance = rgb.sum(axis=-1) * golden[..., 3] // (3 * 255 * 3)  # about 30% of the premultiplied gray
+    heatmap = np.stack((np.maximum(luminance, heat), luminance, luminance), axis=-1)
+    os.makedirs(os.path.dirname(heatmap_path) or '.', exist_ok=True)
+    Image.fromarray(heatmap.astype(np.uint8), 'RGB').save(heatmap_path, compress_level=1)
+
+
+def _compare_file(task):
+    rel_path, golden_dir, output_dir, tolerance, max_bad_fraction, heatmap_dir = task
+    golden_path = os.path.join(golden_dir, rel_path)
+    output_path = os.path.join(output_dir, rel_path)
+    try:
+        if _same_file_contents(golden_path, output_path):
+            return rel_path, True, {"max_diff": [0, 0, 0, 0], "mean_diff": 0.0, "bad_pixels": 0, "bad_fraction": 0.0}
+        golden = _load_rgba(golden_path)
+        output = _load_rgba(output_path)
+    except OSError as e:
+        # Unreadable or truncated files, e.g. left by an interrupted render, fail on their own.
+        return rel_path, False, {"error": f"could not read image: {e}"}
+    if golden.shape != output.shape:
+        return rel_path, False, {"error": f"size {output.shape[1]}x{output.shape[0]}, "
+                                          f"expected {golden.shape[1]}x{golden.shape[0]}"}
+
+    metrics, heat = compare_images(golden, output, tolerance)
+    passed = metrics["bad_fraction"] <= max_bad_fraction
+    if not passed and heatmap_dir:
+        save_heatmap(golden, heat, os.path.join(heatmap_dir, rel_path))
+    return rel_path, passed, metrics
+
+
+def compare_trees(golden_dir, output_dir, tolerance=DEFAULT_TOLERANCE, max_bad_fraction=0.0,
+                  heatmap_dir=None, workers=None):
+    """
+    Diffs every .png in output_dir against the file with the same relative path in golden_dir.
+
+    Args:
+        golden_dir (str): Tree of reference renders.
+        output_dir (str): Tree of renders to check.
+        tolerance (tuple): Allowed absolute difference for the R, G, B and A channels.
+        max_bad_fraction (float): Fraction of pixels allowed over tolerance per image.
+        heatmap_dir (str): If set, a heatmap is saved here for every failing image.
+        workers (int): Worker processes to compare with (default: one per CPU).
+
+    Returns:
+        dict: Maps relative path to (passed, metrics). Files missing from either tree fail.
+    """
+    golden_paths = set(collect_pngs(golden_dir))
+    output_paths = set(collect_pngs(output_dir))
+    results = {}
+    for rel_path in golden_paths - output_paths:
+        results[rel_path] = (False, {"error": "missing from output"})
+    for rel_path in output_paths - golden_paths:
+        results[rel_path] = (False, {"error": "not in golden tree"})
+
+    tasks = [(rel_path, golden_dir, output_dir, tuple(tolerance), max_bad_fraction, heatmap_dir)
+             for rel_path in sorted(golden_paths & output_paths)]
+    with multiprocessing.Pool(workers) as pool:
+        for rel_path, passed, metrics in pool.imap_unordered(_compare_file, tasks, chunksize=4):
+            results[rel_path] = (passed, metrics)
+    return results
+
+
+def parse_tolerance(value):
+    """Parses '2' (every channel) or '2,2,2,0' (R,G,B,A) into a 4-tuple."""
+    try:
+        parts = [int(v) for v in value.split(',')]
+    except ValueError:
+        raise ValueError(f"tolerance must be whole numbers, got '{value}'") from None
+    if any(part < 0 for part in parts):
+        raise ValueError("tolerance must not be negative")
+    if len(parts) == 1:
+        return tuple(parts * 4)
+    if len(parts) != 4:
+        raise ValueError("tolerance must be one value or four comma separated values (R,G,B,A)")
+    return tuple(parts)
+
+
+def print_report(results):
+    """Prints the failing images and a summary line. Returns the number of failures."""
+    failures = 0
+    for rel_path in sorted(results):
+        passed, metrics = results[rel_path]
+        if passed:
+            continue
+        failures += 1
+        if "error" in metrics:
+            print(f"FAIL {rel_path}: {metrics['error']}")
+        else:
+            print(f"FAIL {rel_path}: {metrics['bad_pixels']} pixels over tolerance "
+                  f"({metrics['bad_fraction']:.4%}), max diff RGBA {metrics['max_diff']}, "
+                  f"mean diff {metrics['mean_diff']:.3f}")
+    print(f"{len(results) - failures}/{len(results)} images match.")
+    return failures
@@ -1,5 +1,8 @@
 import os
+import re
 from PIL import Image
+from quality import get_profile, profile_output_dir
+from token_index import entry_matches_file, load_entries
 
 # --- Configuration ---
 DPI = 300  # Dots Per Inch
@@ -50,33 +53,29 @@ def create_new_sheet():
     return Image.new('RGBA', (PAPER_WIDTH_PX, PAPER_HEIGHT_PX), 'white')
 
 
-def main():
-    """
-    Generates print sheets for character and reminder tokens.
-    """
-    # --- 1. Setup ---
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
+def _remove_old_sheets(output_dir):
+    """Deletes the print_sheet_N.png files of a previous run so a shorter run leaves none behind."""
+    for file in os.listdir(output_dir):
+        if re.fullmatch(r'print_sheet_\d+\.png', file):
+            os.remove(os.path.join(output_dir, file))
 
-    # --- 2. Collect all token images ---
-    char_paths = collect_image_paths(CHARACTER_TOKEN_DIR)
-    reminder_paths = collect_image_paths(REMINDER_TOKEN_DIR)
 
-    character_tokens = []
-    reminder_tokens = []
-    for path in char_paths:
-        character_tokens.append({'path': path, 'size': CHAR_TOKEN_SIZE_PX})
-    for path in reminder_paths:
-        reminder_tokens.append({'path': path, 'size': REMINDER_TOKEN_SIZE_PX})
+def plan_sheets(char_paths, reminder_paths):
+    """
+    Arranges tokens on letter-sized sheets without opening any image.
 
-    if not character_tokens and not character_tokens:
-        print("No token images found. Please run create_tokens.py first.")
-        return
+    Args:
+        char_paths (list): Paths of character token images.
+        reminder_paths (list): Paths of reminder token images.
 
-    print(f"Found {len(char_paths)} character tokens and {len(reminder_paths)} reminder tokens.")
+    Returns:
+        list: One list per sheet of (path, size, x, y) placements, in pixels.
+    """
+    character_tokens = [{'path': path, 'size': CHAR_TOKEN_SIZE_PX} for path in char_paths]
+    reminder_tokens = [{'path': path, 'size': REMINDER_TOKEN_SIZE_PX} for path in reminder_paths]
+    sheets = []
 
-    # --- 3. Arrange tokens on sheets ---
-    sheet_num = 1
-    current_sheet = create_new_sheet()
+    current_plan = []
     x_pos = MARGIN_PX
     y_pos = MARGIN_PX
     row_height = 0
@@ -135,46 +134,92 @@ def main():
 
                 # A reminder fits, so place it.
                 r_token = reminder_tokens.pop()
-                try:
-                    with Image.open(r_token['path']) as token_img:
-                        cropped_token = token_img.crop(token_img.getbbox())
-                        resized_img = cropped_token.resize((REMINDER_TOKEN_SIZE_PX, REMINDER_TOKEN_SIZE_PX), Image.Resampling.LANCZOS)
-                        current_sheet.paste(resized_img, (x_pos, y_pos), resized_img)
-                        sheet_has_content = True
-                except Exception as e:
-                    print(f"Error processing image {r_token['path']}: {e}")
-                    continue
+                current_plan.append((r_token['path'], REMINDER_TOKEN_SIZE_PX, x_pos, y_pos))
+                sheet_has_content = True
                 x_pos += REMINDER_TOKEN_SIZE_PX + PADDING_PX
                 row_height = max(row_height, REMINDER_TOKEN_SIZE_PX + PADDING_PX)
 
             # Now the sheet is as full as we can make it.
-            output_filename = os.path.join(OUTPUT_DIR, f'print_sheet_{sheet_num}.png')
-            current_sheet.save(output_filename)
-            print(f"Saved {output_filename}")
-
-            sheet_num += 1
-            current_sheet = create_new_sheet()
+            sheets.append(current_plan)
+            current_plan = []
             x_pos, y_pos, row_height, sheet_has_content = MARGIN_PX, MARGIN_PX, 0, False
             continue # Restart loop for the pending_token on the new sheet.
 
-        try:
-            with Image.open(path) as token_img:
-                cropped_token = token_img.crop(token_img.getbbox())
-                resized_img = cropped_token.resize((size, size), Image.Resampling.LANCZOS)
-                current_sheet.paste(resized_img, (x_pos, y_pos), resized_img)
-                sheet_has_content = True
-        except Exception as e:
-            print(f"Error processing image {path}: {e}")
-            continue
+        current_plan.append((path, size, x_pos, y_pos))
+        sheet_has_content = True
 
         x_pos += size + PADDING_PX
         row_height = max(row_height, size + PADDING_PX)
 
     if sheet_has_content:
-        output_filename = os.path.join(OUTPUT_DIR, f'print_sheet_{sheet_num}.png')
-        current_sheet.save(output_filename)
+        sheets.append(current_plan)
+    return sheets
+
+
+def layout_sheets(char_paths, reminder_paths, output_dir=None):
+    """
+    Arranges token images on letter-sized sheets and saves them to output_dir.
+
+    Tokens are cropped to the content bbox recorded in their tree's index; only
+    tokens missing from the index, or changed on disk since it was written, are scanned.
+    Sheets left in output_dir by a previous run are removed first.
+
+    Args:
+        char_paths (list): Paths of character token images.
+        reminder_paths (list): Paths of reminder token images.
+        output_dir (str): The folder to save the sheets in (default: the active
+                          profile's print sheet folder).
+
+    Returns:
+        dict: Maps each placed token path to the filename of the sheet it was placed on.
+    """
+    output_dir = output_dir or profile_output_dir(OUTPUT_DIR)
+    os.makedirs(output_dir, exist_ok=True)
+    _remove_old_sheets(output_dir)
+    token_index = load_entries(profile_output_dir(CHARACTER_TOKEN_DIR), profile_output_dir(REMINDER_TOKEN_DIR))
+    placements = {}
+
+    for sheet_num, sheet_plan in enumerate(plan_sheets(char_paths, reminder_paths), start=1):
+        sheet_filename = f'print_sheet_{sheet_num}.png'
+        current_sheet = create_new_sheet()
+        for path, size, x_pos, y_pos in sheet_plan:
+            try:
+                with Image.open(path) as token_img:
+                    entry = token_index.get(os.path.normpath(path))
+                    if entry and tuple(entry["size"]) == token_img.size and entry_matches_file(entry, path):
+                        bbox = entry["bbox"]
+                    else:
+                        bbox = token_img.getbbox()
+                    cropped_token = token_img.crop(bbox)
+                    resized_img = cropped_token.resize((size, size), get_profile()["resample"])
+                    current_sheet.paste(resized_img, (x_pos, y_pos), resized_img)
+                    placements[path] = sheet_filename
+            except Exception as e:
+                print(f"Error processing image {path}: {e}")
+
+        output_filename = os.path.join(output_dir, sheet_filename)
+        current_sheet.save(output_filename, compress_level=get_profile()["compress_level"])
         print(f"Saved {output_filename}")
-    print(f"\nPrint sheet generation complete. Sheets are in the '{OUTPUT_DIR}' directory.")
+    print(f"\nPrint sheet generation complete. Sheets are in the '{output_dir}' directory.")
+    return placements
+
+
+def main():
+    """
+    Generates print sheets for character and reminder tokens.
+    """
+    # --- 1. Collect all token images ---
+    char_paths = collect_image_paths(profile_output_dir(CHARACTER_TOKEN_DIR))
+    reminder_paths = collect_image_paths(profile_output_dir(REMINDER_TOKEN_DIR))
+
+    if not char_paths and not reminder_paths:
+        print("No token images found. Please run create_tokens.py first.")
+        return
+
+    print(f"Found {len(char_paths)} character tokens and {len(reminder_paths)} reminder tokens.")
+
+    # --- 2. Arrange tokens on sheets ---
+    layout_sheets(char_paths, reminder_paths)
 
 
 if __name__ == '__main__':
@@ -1,10 +1,14 @@
+import functools
+import hashlib
 import json
 import time
 import io
 import os
-import requests
 import math
-from arc_text import draw_text_on_arc
+from arc_text import draw_text_on_arc, text_length, verify_font_metrics
+from catalog import iter_characters
+from quality import get_profile, get_profile_name, profile_output_dir
+from token_index import file_stamp, update_index
 from PIL import Image, ImageDraw, ImageFont
 
 
@@ -13,6 +17,44 @@ CANVAS_HEIGHT = 1024
 MIDDLE_X = CANVAS_WIDTH // 2
 NAME_Y = CANVAS_HEIGHT * 0.77
 IMAGE_Y = 0.60
+NAME_FONT_SIZE = 120  # Character names on the bottom arc
+REMINDER_FONT_SIZE = 140  # Reminder text on the bottom arc
+
+JSON_FILE_PATH = 'assets/json/menagerie_fixed.json'
+OUTPUT_FOLDER = 'character_tokens'
+REMINDER_OUTPUT_FOLDER = 'reminder_tokens'
+FONT_PATHS = {
+    "name": "assets/fonts/dum1.ttf",
+    "description": "assets/fonts/trade-gothic-lt.ttf",
+    "reminder": "assets/fonts/trade-gothic-lt-std.otf",
+    "reminder_count":  "assets/fonts/trade-gothic-lt-std-bold-condensed.otf"
+}
+BACKGROUND_PATHS = {
+    "both": "assets/backgrounds_light/left right token.png",
+    "first": "assets/backgrounds_light/left token.png",
+    "other": "assets/backgrounds_light/right token.png",
+    "none": "assets/backgrounds_light/non token.png",
+    "reminder": "assets/backgrounds_light/reminder.png"
+}
+
+# Decoded and cropped character art keyed by character id, shared by the
+# character token and its reminder tokens. Entries are released once both are
+# rendered (see release_character_assets) so memory does not grow with the catalog.
+_CHARACTER_IMAGE_CACHE = {}
+# Decoded RGBA backgrounds keyed by path; tokens draw on a copy.
+_BACKGROUND_CACHE = {}
+# Content bbox of each background as saved, keyed by (path, canvas size, resample filter).
+_BACKGROUND_BBOX_CACHE = {}
+# Metadata of tokens saved since the last pop_token_metadata(), keyed by output tree
+# and then by path relative to it. Written to each tree's index by write_token_indexes.
+_TOKEN_METADATA = {}
+
+
+@functools.lru_cache(maxsize=None)
+def _load_font(font_path, font_size):
+    """Loads a font once per (path, size); FreeTypeFont objects are reusable."""
+    return ImageFont.truetype(font_path, font_size)
+
 
 def _calc_scale_by_max_height(img, max_height, max_scale=1.5, max_width=1024):
     print(f'img size: {img.size}')
@@ -27,30 +69,19 @@ def _calc_scale_by_max_height(img, max_height, max_scale=1.5, max_width=1024):
 def _setup_canvas(character_data, background_paths, image_size):
     """1. Sets up the canvas with the background"""
 
-    # --- 1a. Select and Load Background Image ---
-    has_first_night = "firstNight" in character_data
-    has_other_night = "otherNight" in character_data
-
-    if has_first_night and has_other_night:
-        bg_path = background_paths["both"]
-    elif has_first_night:
-        bg_path = background_paths["first"]
-    elif has_other_night:
-        bg_path = background_paths["other"]
-    else:
-        bg_path = background_paths["none"]
-
-    final_image = Image.open(bg_path).convert("RGBA")
+    # --- 1a. Load the Background Image picked by the catalog loader ---
+    bg_path = background_paths[character_data["background"]]
+    final_image = _get_background(bg_path)
     draw = ImageDraw.Draw(final_image)
     return final_image, draw
 
 
 def _add_reminder_number(final_image, draw, character_data, font_path, image_size):
-    total_reminders = len(character_data.get("reminders", []))
+    total_reminders = character_data["reminder_count"]
     if total_reminders > 0:
         W, H = image_size
         font_size = 70
-        font = ImageFont.truetype(font_path, font_size)
+        font = _load_font(font_path, font_size)
         text = str(total_reminders)
         
         # Calculate text size and position
@@ -61,15 +92,18 @@ def _add_reminder_number(final_image, draw, character_data, font_path, image_siz
         text_x = W//2
         text_y = text_height/2 + padding
 
-        # Create a new image for the text with transparency
-        text_layer = Image.new('RGBA', (W, H), (0, 0, 0, 0))
+        # Create a transparent layer covering only the number's bounding box.
+        # Offsets are whole pixels so the glyphs rasterize exactly as on a full-size layer.
+        left, top, right, bottom = draw.textbbox((text_x, text_y), text, font=font, anchor="mm")
+        left, top = math.floor(left), math.floor(top)
+        text_layer = Image.new('RGBA', (math.ceil(right) - left, math.ceil(bottom) - top), (0, 0, 0, 0))
         text_draw = ImageDraw.Draw(text_layer)
 
         # Draw the text in white with low opacity (e.g., 128 out of 255)
-        text_draw.text((text_x, text_y), text, font=font, anchor="mm", fill=(255, 255, 255, 175))
+        text_draw.text((text_x - left, text_y - top), text, font=font, anchor="mm", fill=(255, 255, 255, 175))
 
         # Composite the text layer onto the final image
-        final_image.alpha_composite(text_layer)
+        final_image.alpha_composite(text_layer, dest=(left, top))
 
 
 def _paste_character_image(final_image, char_img, pos=None, scale_factor=1.0):
@@ -78,7 +112,7 @@ def _paste_character_image(final_image, char_img, pos=None, scale_factor=1.0):
     if img_w == 0 or img_h == 0:
         return # Avoid division by zero if image is empty after crop
     new_dimensions = (int(img_w * scale_factor), int(img_h * scale_factor))
-    char_img = char_img.resize(new_dimensions, Image.Resampling.LANCZOS)
+    char_img = char_img.resize(new_dimensions, get_profile()["resample"])
 
     if pos:
         paste_x, paste_y = pos
@@ -101,40 +135,116 @@ def _crop_transparent_area(img):
     return img
 
 
+def _get_background(bg_path):
+    """Returns a fresh copy of a background image, decoding each file only once."""
+    if bg_path not in _BACKGROUND_CACHE:
+        _BACKGROUND_CACHE[bg_path] = Image.open(bg_path).convert("RGBA")
+    return _BACKGROUND_CACHE[bg_path].copy()
+
+
+def _background_bbox(bg_path, size, resample):
+    """Returns the content bbox of a background resized to size, scanning each one only once."""
+    key = (bg_path, size, resample)
+    if key not in _BACKGROUND_BBOX_CACHE:
+        background = _get_background(bg_path)
+        if background.size != size:
+            background = background.resize(size, resample)
+        _BACKGROUND_BBOX_CACHE[key] = background.getbbox()
+    return _BACKGROUND_BBOX_CACHE[key]
+
+
+def _content_bbox(image, background_bbox):
+    """
+    Returns image.getbbox(), scanning only the margins around background_bbox when possible.
+
+    Tokens are drawn over their background, so their content normally covers exactly
+    the background's bbox. That is the case when the margins outside it are still
+    transparent and each of its edges still holds a visible pixel; otherwise the
+    whole image is scanned.
+    """
+    if not background_bbox:
+        return image.getbbox()
+    left, top, right, bottom = background_bbox
+    width, height = image.size
+    margins = ((0, 0, width, top), (0, bottom, width, height), (0, top, left, bottom), (right, top, width, bottom))
+    edges = ((left, top, right, top + 1), (left, bottom - 1, right, bottom),
+             (left, top, left + 1, bottom), (right - 1, top, right, bottom))
+    if any(image.crop(box).getbbox() for box in margins) or not all(image.crop(box).getbbox() for box in edges):
+        return image.getbbox()
+    return background_bbox
+
+
+def load_assets(characters, background_paths):
+    """
+    Decodes the backgrounds and the cropped art of the given characters.
+
+    Returns:
+        tuple: (backgrounds, sprites) where backgrounds maps background path to image and
+               sprites maps character id to image, or None for characters without art.
+    """
+    backgrounds = {}
+    for bg_path in set(background_paths.values()):
+        _get_background(bg_path)
+        backgrounds[bg_path] = _BACKGROUND_CACHE[bg_path]
+    sprites = {character["id"]: _get_character_image(character) for character in characters}
+    return backgrounds, sprites
+
+
+def seed_asset_caches(backgrounds, sprites):
+    """Fills the background and art caches with already decoded images, e.g. shared by another process."""
+    _BACKGROUND_CACHE.update(backgrounds)
+    _CHARACTER_IMAGE_CACHE.update(sprites)
+
+
+def clear_asset_caches():
+    """Drops all decoded backgrounds and character art."""
+    _BACKGROUND_CACHE.clear()
+    _CHARACTER_IMAGE_CACHE.clear()
+
+
+def release_character_assets(char_id):
+    """Drops the cached art of a character whose tokens are all rendered."""
+    _CHARACTER_IMAGE_CACHE.pop(char_id, None)
+
+
 def _get_character_image(character_data):
-    """Gets the character image from local cache or by downloading it."""
-    image_url = character_data.get("image")
-    if not image_url:
-        return None
+    """Gets the character image from the in-memory cache, the local cache or by downloading it."""
+    char_id = character_data["id"]
+    if char_id not in _CHARACTER_IMAGE_CACHE:
+        _CHARACTER_IMAGE_CACHE[char_id] = _load_character_image(character_data)
+    return _CHARACTER_IMAGE_CACHE[char_id]
 
-    # Handle case where 'image' is a list
-    if isinstance(image_url, list):
-        image_url = image_url[0]
 
-    # Define a path to save downloaded images
-    image_assets_path = "assets/character_images"
-    os.makedirs(image_assets_path, exist_ok=True)
+def _load_character_image(character_data):
+    """Loads the character image from local cache or by downloading it."""
+    image_url = character_data["image"]
+    if not image_url:
+        return None
 
-    # Create a unique filename for the character image
-    image_filename = os.path.join(image_assets_path, f"{character_data.get('id')}.png")
+    # The catalog loader resolves where downloaded images are cached
+    image_filename = character_data["image_cache_path"]
+    os.makedirs(os.path.dirname(image_filename), exist_ok=True)
 
     # Check if the image already exists locally
+    image = None
     if os.path.exists(image_filename):
-        print(f"Using local image for {character_data.get('name')}: {image_filename}")
+        print(f"Using local image for {character_data['name']}: {image_filename}")
         try:
             image = Image.open(image_filename).convert("RGBA")
         except Exception as e:
-            print(f"Error processing local image for {character_data.get('name')}: {e}. Attempting to re-download.")
+            print(f"Error processing local image for {character_data['name']}: {e}. Attempting to re-download.")
             image = None        
     # If failed or not downloaded, download image with retries
     if not image:
+        # Only pay for importing requests when an image actually has to be fetched.
+        import requests
         retries = 3
         delay = 5  # seconds
         for attempt in range(retries):
             try:
                 response = requests.get(image_url, timeout=15)
                 response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
-                print(f"Successfully downloaded image for {character_data.get('name')} on attempt {attempt + 1}")
+                print(f"Successfully downloaded image for {character_data['name']} on attempt {attempt + 1}")
                 # Process and save image
                 try:
                     char_img_data = io.BytesIO(response.content)
@@ -142,14 +252,15 @@ def _get_character_image(character_data):
                     image.save(image_filename)  # Save the downloaded image locally
                     # return _crop_transparent_area(Image.open(image_filename).convert("RGBA"))
                 except Exception as e:
-                    print(f"Error processing image for {character_data.get('name')} after download: {e}")
+                    print(f"Error processing image for {character_data['name']} after download: {e}")
                     return None
+                break
             except requests.exceptions.RequestException as e:
-                print(f"Attempt {attempt + 1} failed for {character_data.get('name')}: {e}. Retrying in {delay} seconds...")
+                print(f"Attempt {attempt + 1} failed for {character_data['name']}: {e}. Retrying in {delay} seconds...")
                 time.sleep(delay)
     if image:
         return _crop_transparent_area(image)
-    print(f"Could not download image for {character_data.get('name')} after {retries} attempts.")
+    print(f"Could not download image for {character_data['name']} after {retries} attempts.")
     return None
 
 
@@ -187,8 +298,8 @@ def get_max_line_width(y_position, line_height, image_size, margin_px=0):
 
 def _calculate_ability_text_layout(character_data, font_path, image_size):
     """Calculates font size and wrapped text for the ability."""
-    name = character_data.get("name", "")
-    ability_text = character_data.get("ability", "")
+    name = character_data["name"]
+    ability_text = character_data["ability"]
     if not ability_text:
         return None, None, 50  # Return default font size
 
@@ -207,7 +318,7 @@ def _calculate_ability_text_layout(character_data, font_path, image_size):
             font_size = MINIMUM_FONT_SIZE
             break
         max_lines = (100-font_size) // 10.8
-        font = ImageFont.truetype(font_path, font_size) # Load the font
+        font = _load_font(font_path, font_size) # Load the font
 
         words = ability_text.split()
         wrapped_lines = []
@@ -233,7 +344,7 @@ def _calculate_ability_text_layout(character_data, font_path, image_size):
         total_lines = len(wrapped_lines)
 
     wrapped_text = "\n".join(wrapped_lines)
-    name = character_data.get("name", "").upper()
+    name = character_data["name"].upper()
     print(f'{name}: total lines: {total_lines} font size: {font_size}')
     return font, wrapped_text, font_size
 
@@ -255,9 +366,13 @@ def _add_ability_text(draw, font, wrapped_text, image_size):
     )
 
 def _create_reminder_tokens(character_data, font_path, background_path, image_size=(1024, 1024)):
-    reminders = character_data.get("reminders", [])
+    """Creates the reminder tokens for a character and returns the paths of the saved images."""
+    reminders = character_data["reminders"]
     if not reminders:
-        return
+        return []
+    if not get_profile()["reminders"]:
+        print(f'Skipping reminder tokens for {character_data["name"]} in this quality profile')
+        return []
 
     W, H = image_size
     text_x = W // 2
@@ -267,23 +382,21 @@ def _create_reminder_tokens(character_data, font_path, background_path, image_si
     
     char_img_obj = _get_character_image(character_data)
     if not char_img_obj:
-        print(f'No image found for {character_data.get("name")}')
-        return
+        print(f'No image found for {character_data["name"]}')
+        return []
     print(f'image pos: {image_pos}')
     print(f'text_y {text_y}')
     image_top_max = H * 0.35
     scale = _calc_scale_by_max_height(char_img_obj, text_y - image_top_max)
 
+    output_filenames = []
     for index, reminder in enumerate(reminders):
-        reminder_image = Image.open(background_path).convert("RGBA")
+        reminder_image = _get_background(background_path)
 
         if reminder:
-            font_size = 140
-            font = ImageFont.truetype(font_path, font_size)
+            font = _load_font(font_path, REMINDER_FONT_SIZE)
             radius = int(W * 0.38)
-            draw = ImageDraw.Draw(reminder_image)
-            text_length = draw.textlength(reminder, font=font)
-            text_angle_deg = math.degrees( text_length / radius)
+            text_angle_deg = math.degrees( text_length(font, reminder) / radius)
             start_angle_deg = int(90 + text_angle_deg / 2)
             draw_text_on_arc(
                 image=reminder_image,
@@ -292,39 +405,64 @@ def _create_reminder_tokens(character_data, font_path, background_path, image_si
                 start_angle_deg=start_angle_deg,
                 text=reminder,
                 font=font,
-                fill='white')
+                fill='white',
+                resample=get_profile()["rotate_resample"])
             _paste_character_image(reminder_image, char_img_obj, pos=image_pos, scale_factor=scale)
 
         # Save the reminder image
-        reminder_output_path = "reminder_tokens"
-        team_name = character_data.get("team")
+        reminder_root = profile_output_dir(REMINDER_OUTPUT_FOLDER)
+        reminder_output_path = reminder_root
+        team_name = character_data["team"]
         if team_name:
             reminder_output_path = os.path.join(reminder_output_path, team_name.lower().replace(" ", "_"))
         
-        char_id = character_data.get("id")
-        if char_id:
-            reminder_output_path = os.path.join(reminder_output_path, char_id)
+        reminder_output_path = os.path.join(reminder_output_path, character_data["id"])
         
         os.makedirs(reminder_output_path, exist_ok=True)
         
         # Sanitize reminder text for filename
         sanitized_reminder_text = reminder.replace(" ", "_")
         output_filename = f"{reminder_output_path}/{sanitized_reminder_text}_{index}.png"
-        reminder_image.save(output_filename)
+        _save_token(reminder_image, output_filename, reminder_root, character_data,
+                    {"background": background_path, "reminder": font_path}, reminder)
+        output_filenames.append(output_filename)
         print(f"Created reminder token for {reminder} at {output_filename}")
+    return output_filenames
     
 
-def _get_arc_text_top_y_in_slice(name_arc_img, center_x, width):
+def verify_arc_text_metrics(characters):
+    """
+    Checks the cached font metrics against direct measurement for every name and reminder.
+
+    Returns:
+        list: A description of each mismatch; empty if every arc is laid out exactly.
+    """
+    names = set()
+    reminders = set()
+    for character in characters:
+        names.add(character["name"].upper().strip())
+        reminders.update(reminder.strip() for reminder in character["reminders"])
+    name_font = _load_font(FONT_PATHS["name"], NAME_FONT_SIZE)
+    reminder_font = _load_font(FONT_PATHS["reminder"], REMINDER_FONT_SIZE)
+    return (verify_font_metrics(name_font, sorted(names), int(CANVAS_WIDTH * .40))
+            + verify_font_metrics(reminder_font, sorted(reminders), int(CANVAS_WIDTH * 0.38)))
+
+
+def _get_arc_text_top_y_in_slice(name_arc, center_x, width):
     """
     Finds the highest non-transparent pixel y-coordinate within a given width centered at center_x.
     This is used to nestle the character image into the curve of the name text.
+
+    name_arc is the (text_layer, (x, y)) pair returned by draw_text_on_arc; coordinates
+    in and out are in token space.
     """
-    if not name_arc_img:
+    if not name_arc:
         return None
 
+    name_arc_img, (offset_x, offset_y) = name_arc
     img_w, img_h = name_arc_img.size
-    x_start = max(0, int(center_x - width / 2))
-    x_end = min(img_w, int(center_x + width / 2))
+    x_start = max(0, int(center_x - width / 2) - offset_x)
+    x_end = min(img_w, int(center_x + width / 2) - offset_x)
 
     min_y = img_h
 
@@ -343,87 +481,183 @@ def _get_arc_text_top_y_in_slice(name_arc_img, center_x, width):
                     min_y = y
                 break  # Found topmost pixel for this column, move to next x
     
-    return min_y if min_y != img_h else None
+    return min_y + offset_y if min_y != img_h else None
+
+
+def _get_arc_text_top_y(name_arc):
+    """Returns the token-space y-coordinate of the top of the name arc, or None."""
+    if not name_arc:
+        return None
+    name_arc_img, (_, offset_y) = name_arc
+    bbox = name_arc_img.getbbox()
+    return bbox[1] + offset_y if bbox else None
 
 def _add_character_name(image, character_data, font_path, image_size):
     """4. Adds the character's name to the bottom of the token."""
-    name = character_data.get("name", "").upper()
+    name = character_data["name"].upper()
     if not name:
         return None
     W, H = image_size
-    LARGE_FONT_SIZE = 120
+    LARGE_FONT_SIZE = NAME_FONT_SIZE
     MED_FONT_SIZE = 90
     SMALL_FONT_SIZE = 74
     
     # Determine font size dynamically
     name_font_size = LARGE_FONT_SIZE
-    name_font = ImageFont.truetype(font_path, name_font_size)
+    name_font = _load_font(font_path, name_font_size)
     max_name_width = W * 0.60
 
-    name_font_length = name_font.getlength(name)
+    name_font_length = text_length(name_font, name)
     # if name_font_length > max_name_width:
     #     name_font_size = MED_FONT_SIZE
     #     name_font = ImageFont.truetype(font_path, name_font_size)
-    #     name_font_length = name_font.getlength(name)
+    #     name_font_length = text_length(name_font, name)
     #     if name_font_length > max_name_width:
     #         name_font_size = SMALL_FONT_SIZE
-    print(f'name: {name}  font length: {name_font.getlength(name)} font size {name_font_size}')
-    name_font = ImageFont.truetype(font_path, name_font_size)
+    print(f'name: {name}  font length: {name_font_length} font size {name_font_size}')
+    name_font = _load_font(font_path, name_font_size)
     radius = int(W * .40)
-    draw = ImageDraw.Draw(image)
     font = name_font
-    text_width = draw.textlength(name, name_font)
+    text_width = text_length(name_font, name)
     text_angle_deg = math.degrees( text_width / radius)
     start_angle_deg = 90 + text_angle_deg / 2
-    arc_text = draw_text_on_arc(
+    name_arc = draw_text_on_arc(
         image=image,
         center_xy=(W // 2, H //2),
         radius=radius,
         start_angle_deg=start_angle_deg,
         text=name,
         font=font,
-        fill='black'
+        fill='black',
+        resample=get_profile()["rotate_resample"]
     )
-    return arc_text
+    return name_arc
 
 
-def _finalize_and_save(final_image, character_data, output_path):
-    """5. Finalizes and saves the token image."""
-    char_id = character_data.get("id")
+@functools.lru_cache(maxsize=None)
+def _file_hash(path):
+    """Hashes a font, background or art file once per process."""
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _input_hash(character_data, input_paths, reminder=None):
+    """
+    Hashes everything a token is rendered from, so unchanged tokens can be recognized.
+
+    input_paths maps each role ("background", "name", ...) to the file the token was
+    drawn with; the contents of those files and of the character's art are hashed too,
+    so replacing any of them changes the hash.
+    """
+    files = {role: [path, _file_hash(path)] for role, path in input_paths.items() if path}
+    art_path = character_data["image_cache_path"]
+    if os.path.exists(art_path):
+        files["art"] = [art_path, _file_hash(art_path)]
+    inputs = {
+        "character": character_data,
+        "reminder": reminder,
+        "profile": get_profile_name(),
+        "files": files,
+    }
+    return hashlib.sha1(json.dumps(inputs, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _save_token(image, output_filename, tree_root, character_data, input_paths, reminder=None):
+    """
+    Saves a token at the active profile's canvas size and PNG compression level,
+    and records its metadata for the index of the output tree at tree_root.
+
+    input_paths maps each role to the font or background file the token was drawn
+    with. The cached bbox of its "background" spares a full scan of the token.
+    """
+    profile = get_profile()
+    canvas_size = profile["canvas_size"]
+    if image.size != (canvas_size, canvas_size):
+        image = image.resize((canvas_size, canvas_size), profile["resample"])
+    image.save(output_filename, compress_level=profile["compress_level"])
+
+    # The bbox is taken while the image is in memory so the sheet builder never has to scan for it.
+    bbox = _content_bbox(image, _background_bbox(input_paths["background"], image.size, profile["resample"]))
+    entry = {
+        "id": character_data["id"],
+        "team": character_data["team"],
+        "size": list(image.size),
+        "bbox": list(bbox) if bbox else None,
+        "input_hash": _input_hash(character_data, input_paths, reminder),
+        **file_stamp(output_filename),
+    }
+    if reminder is not None:
+        entry["reminder"] = reminder
+    rel_path = os.path.relpath(output_filename, tree_root).replace(os.sep, "/")
+    _TOKEN_METADATA.setdefault(tree_root, {})[rel_path] = entry
+
+
+def pop_token_metadata():
+    """Returns and clears the metadata of the tokens saved by this process."""
+    metadata = dict(_TOKEN_METADATA)
+    _TOKEN_METADATA.clear()
+    return metadata
+
+
+def write_token_indexes(metadata):
+    """Merges metadata from pop_token_metadata() into the index of each output tree."""
+    for tree_root, entries in metadata.items():
+        update_index(tree_root, entries)
+
+
+def _finalize_and_save(final_image, character_data, output_path, input_paths):
+    """5. Finalizes and saves the token image, returning its path."""
+    char_id = character_data["id"]
     # final_image.putalpha(mask) # Apply the circular mask
     # # Create a subfolder for the team if team data is available
-    team_name = character_data.get("team")
+    team_name = character_data["team"]
+    tree_root = output_path
     if team_name:
         team_output_path = os.path.join(output_path, team_name.lower().replace(" ", "_"))
-        if not os.path.exists(team_output_path):
-            os.makedirs(team_output_path)
+        os.makedirs(team_output_path, exist_ok=True)
         output_path = team_output_path
 
     output_filename = f"{output_path}/{char_id}.png"
-    final_image.save(output_filename)
-    print(f"Created token for {character_data.get('name')} at {output_filename}")
+    _save_token(final_image, output_filename, tree_root, character_data, input_paths)
+    print(f"Created token for {character_data['name']} at {output_filename}")
+    return output_filename
 
 
-def create_character_token(character_data, font_paths, background_paths, output_path, image_size=(1024, 1024)):
+def create_reminder_tokens(character_data, font_paths, background_paths, image_size=(1024, 1024)):
+    """
+    Creates the reminder tokens for a character without rendering its character token.
+
+    Args:
+        character_data (dict): A character record from catalog.iter_characters.
+        font_paths (dict): Paths to the .ttf font files, the "reminder" entry is used.
+        background_paths (dict): Paths to the background images, the "reminder" entry is used.
+        image_size (tuple): The size of the output images (width, height).
+
+    Returns:
+        list: Paths of the saved reminder token images.
+    """
+    return _create_reminder_tokens(character_data, font_paths.get("reminder"), background_paths["reminder"], image_size)
+
+
+def create_character_token(character_data, font_paths, background_paths, output_path, image_size=(1024, 1024),
+                           with_reminders=True):
     """
     Creates a circular token for a character by orchestrating helper functions.
 
     Args:
-        character_data (dict): A dictionary containing the character's info.
+        character_data (dict): A character record from catalog.iter_characters.
         font_paths (dict): Paths to the .ttf font files for name and description.
         background_paths (dict): Paths to the background images.
         output_path (str): The folder to save the generated image in.
         image_size (tuple): The size of the output image (width, height).
-    """
-    # --- 0. Pre-check ---
-    char_id = character_data.get("id")
-    if not char_id or char_id == "_meta":
-        return  # Skip meta object
-    
-
-    _create_reminder_tokens(character_data, font_paths.get("reminder"), background_paths["reminder"], image_size)
-
+        with_reminders (bool): Also create the character's reminder tokens.
 
+    Returns:
+        str or None: Path of the saved character token, None if nothing was saved.
+    """
+    # --- 0. Reminder Tokens ---
+    if with_reminders:
+        _create_reminder_tokens(character_data, font_paths.get("reminder"), background_paths["reminder"], image_size)
 
     # --- 1. Setup Canvas ---
     final_image, draw = _setup_canvas(character_data, background_paths, image_size)
@@ -441,7 +675,7 @@ def create_character_token(character_data, font_paths, background_paths, output_
     _add_ability_text(draw, font, wrapped_text, image_size)
 
     # --- 4. Add Character Name ---
-    name_arc_img = _add_character_name(final_image, character_data, font_paths.get("name"), image_size)
+    name_arc = _add_character_name(final_image, character_data, font_paths.get("name"), image_size)
 
     # --- 5. Add Character Image ---
     if char_img_obj:
@@ -467,7 +701,7 @@ def create_character_token(character_data, font_paths, background_paths, output_
             s = (low_s + high_s) / 2
             w_new = s * img_w_orig
 
-            bottom_limit = _get_arc_text_top_y_in_slice(name_arc_img, W / 2, w_new)
+            bottom_limit = _get_arc_text_top_y_in_slice(name_arc, W / 2, w_new)
             if bottom_limit is None:
                 bottom_limit = NAME_Y  # Fallback
 
@@ -481,9 +715,9 @@ def create_character_token(character_data, font_paths, background_paths, output_
 
         if best_s > 0:
             final_w = best_s * img_w_orig
-            final_bottom_limit = _get_arc_text_top_y_in_slice(name_arc_img, W / 2, final_w)
+            final_bottom_limit = _get_arc_text_top_y_in_slice(name_arc, W / 2, final_w)
             if final_bottom_limit is None:
-                print(f'{character_data.get("name")}: could not find bottom limit in final check, using NAME_Y')
+                print(f'{character_data["name"]}: could not find bottom limit in final check, using NAME_Y')
                 final_bottom_limit = NAME_Y
 
             available_height = final_bottom_limit - top_limit
@@ -491,8 +725,9 @@ def create_character_token(character_data, font_paths, background_paths, output_
             pos = (W // 2, center_y)
             _paste_character_image(final_image, char_img_obj, pos=pos, scale_factor=best_s)
         else: # Fallback to old method if search fails
-            print(f'{character_data.get("name")}: scale search failed, using fallback method')
-            bottom_limit = (name_arc_img.getbbox()[1] - padding) if name_arc_img and name_arc_img.getbbox() else (NAME_Y - padding)
+            print(f'{character_data["name"]}: scale search failed, using fallback method')
+            arc_top = _get_arc_text_top_y(name_arc)
+            bottom_limit = (arc_top - padding) if arc_top is not None else (NAME_Y - padding)
             available_height = bottom_limit - top_limit
             if available_height > 0:
                 image_scale_factor = _calc_scale_by_max_height(char_img_obj, available_height)
@@ -501,40 +736,17 @@ def create_character_token(character_data, font_paths, background_paths, output_
                 _paste_character_image(final_image, char_img_obj, pos=pos, scale_factor=image_scale_factor)
 
     # --- 6. Finalize and Save ---
-    _finalize_and_save(final_image, character_data, output_path)
+    input_paths = {key: font_paths.get(key) for key in ("name", "description", "reminder_count")}
+    input_paths["background"] = background_paths[character_data["background"]]
+    return _finalize_and_save(final_image, character_data, output_path, input_paths)
 
 
 if __name__ == '__main__':
-    # Make sure these paths are correct
-    JSON_FILE_PATH = 'assets/json/menagerie_fixed.json'
-    NAME_FONT_PATH = 'assets/fonts/dum1.ttf'
-    DESCRIPTION_FONT_PATH = 'assets/fonts/trade-gothic-lt.ttf'
-    REMINDER_FONT_PATH = 'assets/fonts/trade-gothic-lt-std.otf'
-    BACKGROUND_PATHS = {
-        "both": "assets/backgrounds_light/left right token.png",
-        "first": "assets/backgrounds_light/left token.png",
-        "other": "assets/backgrounds_light/right token.png",
-        "none": "assets/backgrounds_light/non token.png",
-        "reminder": "assets/backgrounds_light/reminder.png"
-    }
-    OUTPUT_FOLDER = 'character_tokens'
-    fonts = {
-        "name": "assets/fonts/dum1.ttf",
-        "description": "assets/fonts/trade-gothic-lt.ttf",
-        "reminder": "assets/fonts/trade-gothic-lt-std.otf",
-        "reminder_count":  "assets/fonts/trade-gothic-lt-std-bold-condensed.otf"
-    }
-
-    import os
     if not os.path.exists(OUTPUT_FOLDER):
         os.makedirs(OUTPUT_FOLDER)
 
-    with open(JSON_FILE_PATH, 'r', encoding='utf-8') as f:
-        all_characters = json.load(f)
-
-    for  i, character in enumerate(all_characters):
-        print(f'Processing {i+1}/{len(all_characters)}: {character.get("name")}')
-        if character.get("name") not in ['Doppelganger']:
-            pass
-        create_character_token(character, fonts, BACKGROUND_PATHS, OUTPUT_FOLDER)
-    
+    for  i, character in enumerate(iter_characters(JSON_FILE_PATH)):
+        print(f'Processing {i+1}: {character["name"]}')
+        create_character_token(character, FONT_PATHS, BACKGROUND_PATHS, OUTPUT_FOLDER)
+        release_character_assets(character["id"])
+    write_token_indexes(pop_token_metadata())
@@ -0,0 +1,137 @@
+import multiprocessing
+from multiprocessing import shared_memory
+
+from PIL import Image
+
+import create_tokens
+import quality
+
+
+# Shared memory block attached by this worker. It must stay referenced for as long
+# as the images wrapping its buffer are in use.
+_ATTACHED = []
+
+
+def publish_assets(characters, background_paths):
+    """
+    Decodes backgrounds and character art once and packs them into one shared memory block.
+
+    A single block keeps one file descriptor open per process no matter how many
+    characters are published.
+
+    Returns:
+        tuple: (blocks, descriptors). blocks are the SharedMemory objects the caller
+               must close and unlink when rendering is done, descriptors is the
+               picklable (block name, backgrounds, sprites) description passed to
+               workers, where each image is described by (offset, size).
+    """
+    backgrounds, sprites = create_tokens.load_assets(characters, background_paths)
+    # Lay every image out back to back; sprites of characters without art stay None.
+    total = 0
+    background_descriptors = {}
+    for bg_path, image in backgrounds.items():
+        background_descriptors[bg_path] = (total, image.size)
+        total += image.width * image.height * 4
+    sprite_descriptors = {}
+    for char_id, image in sprites.items():
+        if image is None:
+            sprite_descriptors[char_id] = None
+            continue
+        sprite_descriptors[char_id] = (total, image.size)
+        total += image.width * image.height * 4
+
+    shm = shared_memory.SharedMemory(create=True, size=max(1, total))
+    try:
+        for images, image_descriptors in ((backgrounds, background_descriptors), (sprites, sprite_descriptors)):
+            for key, image in images.items():
+                if image is not None:
+                    offset = image_descriptors[key][0]
+                    data = image.tobytes()
+                    shm.buf[offset:offset + len(data)] = data
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+    # The parent's decoded copies are no longer needed once they live in shared memory.
+    create_tokens.clear_asset_caches()
+    return [shm], (shm.name, background_descriptors, sprite_descriptors)
+
+
+def _attach_image(shm, descriptor):
+    """Wraps part of a shared memory block as a PIL image without copying its pixels."""
+    if descriptor is None:
+        return None
+    offset, size = descriptor
+    nbytes = size[0] * size[1] * 4
+    return Image.frombuffer("RGBA", size, shm.buf[offset:offset + nbytes], "raw", "RGBA", 0, 1)
+
+
+def _init_worker(descriptors, profile_name):
+    quality.set_profile(profile_name)
+    name, background_descriptors, sprite_descriptors = descriptors
+    # Workers share the parent's resource tracker, which unlinks the block once the parent does.
+    shm = shared_memory.SharedMemory(name=name)
+    _ATTACHED.append(shm)
+    backgrounds = {bg_path: _attach_image(shm, d) for bg_path, d in background_descriptors.items()}
+    sprites = {char_id: _attach_image(shm, d) for char_id, d in sprite_descriptors.items()}
+    create_tokens.seed_asset_caches(backgrounds, sprites)
+
+
+def _render_character(task):
+    character, with_tokens, with_reminders = task
+    token_path = None
+    reminder_paths = []
+    if with_tokens:
+        token_path = create_tokens.create_character_token(
+            character, create_tokens.FONT_PATHS, create_tokens.BACKGROUND_PATHS,
+            quality.profile_output_dir(create_tokens.OUTPUT_FOLDER), with_reminders=False)
+    if with_reminders:
+        reminder_paths = create_tokens.create_reminder_tokens(
+            character, create_tokens.FONT_PATHS, create_tokens.BACKGROUND_PATHS)
+    create_tokens.release_character_assets(character["id"])
+    return token_path, reminder_paths, create_tokens.pop_token_metadata()
+
+
+def render_characters(characters, with_tokens=True, with_reminders=True, workers=1):
+    """
+    Renders character and reminder tokens, optionally across worker processes.
+
+    With more than one worker, backgrounds and character art are decoded once in
+    this process and shared with every worker through shared memory, so memory use
+    does not grow with the worker count. Fonts are still opened by each worker.
+
+    Args:
+        characters (list): Character records from catalog.iter_characters.
+        with_tokens (bool): Render character tokens.
+        with_reminders (bool): Render reminder tokens.
+        workers (int): Number of worker processes; 1 renders in this process.
+
+    The metadata of every saved token is merged into the index of its output tree.
+
+    Returns:
+        list: (token_path, reminder_paths) for each character, in input order.
+    """
+    tasks = [(character, with_tokens, with_reminders) for character in characters]
+    if workers <= 1:
+        results = []
+        for i, task in enumerate(tasks):
+            print(f'Processing {i+1}/{len(tasks)}: {task[0]["name"]}')
+            results.append(_render_character(task))
+    else:
+        blocks, descriptors = publish_assets(characters, create_tokens.BACKGROUND_PATHS)
+        try:
+            with multiprocessing.Pool(workers, initializer=_init_worker,
+                                      initargs=(descriptors, quality.get_profile_name())) as pool:
+                results = pool.map(_render_character, tasks)
+        finally:
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
+
+    # Workers only report metadata, the index files are written once from this process.
+    metadata = {}
+    for _, _, token_metadata in results:
+        for tree_root, entries in token_metadata.items():
+            metadata.setdefault(tree_root, {}).update(entries)
+    create_tokens.write_token_indexes(metadata)
+    return [(token_path, reminder_paths) for token_path, reminder_paths, _ in results]
@@ -0,0 +1,54 @@
+from PIL import Image
+
+
+# Named render profiles. "final" reproduces the full quality output, "draft" trades
+# quality for speed while iterating on a layout.
+PROFILES = {
+    "final": {
+        "canvas_size": 1024,  # Saved token width/height in pixels
+        "resample": Image.Resampling.LANCZOS,  # Character art and sheet thumbnails
+        "rotate_resample": Image.Resampling.BICUBIC,  # Arc text glyph rotation
+        "compress_level": 6,  # PNG zlib level, Pillow's default
+        "reminders": True,  # Render reminder tokens
+        "output_suffix": "",  # Appended to the token and sheet folder names
+    },
+    "draft": {
+        "canvas_size": 512,
+        "resample": Image.Resampling.BILINEAR,
+        "rotate_resample": Image.Resampling.NEAREST,
+        "compress_level": 1,
+        "reminders": False,
+        "output_suffix": "_draft",
+    },
+}
+DEFAULT_PROFILE = "final"
+
+_active_profile = DEFAULT_PROFILE
+
+
+def set_profile(name):
+    """Selects the render profile used by the token, arc text and sheet modules."""
+    global _active_profile
+    if name not in PROFILES:
+        raise ValueError(f"Unknown quality profile '{name}', expected one of: {', '.join(PROFILES)}")
+    _active_profile = name
+
+
+def get_profile():
+    """Returns the settings of the active render profile."""
+    return PROFILES[_active_profile]
+
+
+def get_profile_name():
+    """Returns the name of the active render profile."""
+    return _active_profile
+
+
+def profile_output_dir(base_dir):
+    """
+    Returns the folder the active profile writes base_dir's output to.
+
+    Draft renders go to their own trees (e.g. character_tokens_draft) so they never
+    overwrite final tokens, sheets or token indexes.
+    """
+    return base_dir + get_profile()["output_suffix"]
@@ -0,0 +1,73 @@
+import json
+import os
+
+
+# Sidecar written at the root of each token output tree (character_tokens, reminder_tokens).
+INDEX_FILENAME = 'index.json'
+
+
+def load_index(tree_root):
+    """
+    Returns the token index of an output tree, or an empty one if there is none.
+
+    The index maps each token's path relative to tree_root to a dict with its
+    character "id", "team", "size" [width, height], content "bbox"
+    [left, top, right, bottom] (None if fully transparent), "input_hash", the
+    "file_size" and "mtime_ns" of the saved PNG and, for reminder tokens, the
+    "reminder" text. See entry_matches_file before trusting an entry.
+    """
+    index_path = os.path.join(tree_root, INDEX_FILENAME)
+    if not os.path.exists(index_path):
+        return {}
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable token index {index_path}: {e}")
+        return {}
+
+
+def file_stamp(path):
+    """Returns the "file_size" and "mtime_ns" fields that tie an index entry to the file it describes."""
+    stat = os.stat(path)
+    return {"file_size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def entry_matches_file(entry, path):
+    """
+    True if entry still describes the file at path.
+
+    A token rewritten or replaced since its entry was recorded, e.g. by a render that
+    did not update the index, no longer matches and must be scanned instead.
+    """
+    try:
+        return {key: entry.get(key) for key in ("file_size", "mtime_ns")} == file_stamp(path)
+    except OSError:
+        return False
+
+
+def update_index(tree_root, entries):
+    """
+    Merges entries (relative path -> metadata) into the tree's index and saves it.
+
+    Entries of tokens that no longer exist on disk are dropped.
+    """
+    index = load_index(tree_root)
+    index.update(entries)
+    index = {rel_path: entry for rel_path, entry in index.items()
+             if os.path.exists(os.path.join(tree_root, rel_path))}
+    os.makedirs(tree_root, exist_ok=True)
+    index_path = os.path.join(tree_root, INDEX_FILENAME)
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=4, sort_keys=True)
+    os.replace(tmp_path, index_path)
+
+
+def load_entries(*tree_roots):
+    """Returns the index entries of several output trees, keyed by normalized token path."""
+    entries = {}
+    for tree_root in tree_roots:
+        for rel_path, entry in load_index(tree_root).items():
+            entries[os.path.normpath(os.path.join(tree_root, rel_path))] = entry
+    return entries